@@ -33,6 +33,9 @@ DASHBOARD_PORT   = int(os.getenv("DASHBOARD_PORT", "8000"))
 
 _TEMPLATE = Path(__file__).parent / "templates" / "dashboard.html"
 
+# One keep-alive session for the stats refresh, which makes a Graph call per item
+_GRAPH = requests.Session()
+
 db.init_db()
 
 app = FastAPI(title="Grubbs INFINITI — Marketplace Dashboard", docs_url=None, redoc_url=None)
@@ -108,14 +111,18 @@ def api_vehicles(
     year:        str  = Query(default=""),
     search:      str  = Query(default=""),
     active_only: bool = Query(default=True),
+    limit:       Optional[int] = Query(default=None, ge=1),   # omit for every match
+    offset:      int  = Query(default=0, ge=0),
 ):
     addendum = _effective_addendum()
-    vehicles = db.get_vehicles(
-        make=make, condition=condition, body_style=body_style,
-        year=year, search=search, active_only=active_only,
-    )
+    filters = dict(make=make, condition=condition, body_style=body_style,
+                   year=year, search=search, active_only=active_only)
+    vehicles = db.get_vehicles(**filters, limit=limit, offset=offset)
+    # "count" is every match; only a paged request needs the extra COUNT query
+    paged = limit is not None or offset > 0
     return {"vehicles": [_enrich_vehicle(v, addendum) for v in vehicles],
-            "count": len(vehicles),
+            "count": db.count_vehicles(**filters) if paged else len(vehicles),
+            "returned": len(vehicles),
             "addendum_amount": addendum}
 
 
@@ -270,7 +277,7 @@ def _fetch_fb_stats():
         params = {"access_token": FB_ACCESS_TOKEN,
                   "fields": "id,vehicle_id,retailer_id,title", "limit": 200}
         while url:
-            resp = requests.get(url, params=params, timeout=30)
+            resp = _GRAPH.get(url, params=params, timeout=30)
             data = resp.json()
             if "error" in data:
                 _fb_stats["last_message"] = f"API error: {data['error'].get('message')}"
@@ -286,10 +293,10 @@ def _fetch_fb_stats():
             vin     = item.get("vehicle_id") or item.get("retailer_id") or item_id
             if not item_id or not vin:
                 continue
-            ins = requests.get(f"{base}/{item_id}/insights",
-                               params={"access_token": FB_ACCESS_TOKEN,
-                                       "fields": "impressions,link_clicks,saves"},
-                               timeout=15).json()
+            ins = _GRAPH.get(f"{base}/{item_id}/insights",
+                             params={"access_token": FB_ACCESS_TOKEN,
+                                     "fields": "impressions,link_clicks,saves"},
+                             timeout=15).json()
             if "error" not in ins:
                 d = (ins.get("data") or [{}])[0]
                 stats.append({"vin": vin,
@@ -7,33 +7,191 @@ Tables
   sync_runs      – one row per fb_marketplace_sync.py execution
   vehicle_stats  – FB impressions/clicks/saves, one row per (vin, date)
   settings       – key/value store for dashboard config (addendum, etc.)
+  vehicles_fts   – FTS5 trigram index over vin/title/stock_number/model
 """
 
+import atexit
+import json
 import os
 import re
 import sqlite3
-from datetime import datetime
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
 
 DB_PATH = os.getenv("DB_PATH", "inventory.db")
 
+# Re-run ANALYZE after a sync touching more than this many vehicles
+ANALYZE_THRESHOLD = 500
+
+# Stored in PRAGMA user_version once init_db() has brought a DB up to date.
+# Bump it whenever the DDL in init_db() or _migrate() changes.
+SCHEMA_VERSION = 2
+
+# DB_TRACE=1 echoes every statement to stderr; off by default (costs a callback per statement)
+_TRACE_SQL = os.getenv("DB_TRACE", "").lower() in ("1", "true", "yes")
+
+# Set by init_db() once the vehicles_fts search index is in place
+_FTS_ENABLED = False
+
+# init_db() only does its work once per process
+_initialized = False
+
+# In-memory query results keyed by name → (db stamp, value); see _cached()
+_cache_lock = threading.RLock()
+_CACHE: dict[str, tuple[tuple, object]] = {}
+
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Connection helper
+# Connection helpers
 # ─────────────────────────────────────────────────────────────────────────────
-def _conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+# Connections are opened once and reused: one writer shared by every thread
+# (SQLite allows a single writer anyway) and one read-only handle per thread.
+_write_lock = threading.Lock()
+_write_conn: sqlite3.Connection | None = None
+_read_local = threading.local()
+
+def _connect(readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        # mode=ro + query_only: readers never take the write lock, so dashboard
+        # queries don't contend with a sync that is writing in WAL mode
+        uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across app crashes in WAL mode; only an OS crash
+        # can lose the last commit, and it saves an fsync on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Caps the rows ANALYZE / PRAGMA optimize sample per index so they never stall a write
+        conn.execute("PRAGMA analysis_limit=400")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")      # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")    # 256 MB memory-mapped reads
+    conn.execute("PRAGMA threads=4")              # helper threads for large ORDER BY sorts
+    if _TRACE_SQL:
+        conn.set_trace_callback(lambda sql: print(f"[db] {sql}", file=sys.stderr))
     return conn
 
 
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    """
+    Yield the shared write connection inside a transaction (commit on
+    success, rollback on error), holding the write lock for the duration.
+    The transaction is BEGIN IMMEDIATE: it takes SQLite's write lock up
+    front (waiting out busy_timeout), so a read-then-write can never fail
+    mid-way with SQLITE_BUSY when the sync subprocess is writing too.
+    On check-in, PRAGMA optimize refreshes planner stats for changed tables.
+    """
+    global _write_conn
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = _connect()
+        with _write_conn:
+            _write_conn.execute("BEGIN IMMEDIATE")
+            yield _write_conn
+        _write_conn.execute("PRAGMA optimize")
+
+
+@contextmanager
+def _conn_ro() -> Iterator[sqlite3.Connection]:
+    """Yield this thread's read-only connection for SELECT-only helpers."""
+    conn = getattr(_read_local, "conn", None)
+    if conn is None:
+        conn = _read_local.conn = _connect(readonly=True)
+    yield conn
+
+
+@atexit.register
+def _close_connections() -> None:
+    """Close the writer (checkpointing the WAL) and this thread's reader.
+    Readers owned by other threads are closed when those threads exit."""
+    global _write_conn
+    with _write_lock:
+        if _write_conn is not None:
+            _write_conn.execute("PRAGMA optimize")
+            _write_conn.close()
+            _write_conn = None
+    conn = getattr(_read_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _read_local.conn = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# In-process caches
+# ─────────────────────────────────────────────────────────────────────────────
+def _db_stamp() -> tuple:
+    """
+    Cheap cross-process change marker for in-memory caches.
+    Every commit appends to the -wal file (and checkpoints rewrite the main
+    file), so a changed (mtime, size) pair means another writer — e.g. the
+    sync subprocess — may have changed the data.
+    """
+    stamp = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _cached(key: str, loader: Callable[[], T], refresh: bool = False) -> T:
+    """Return loader()'s result, reusing it until the database file changes."""
+    with _cache_lock:
+        stamp = _db_stamp()   # taken before loading, so a racing write forces a reload
+        hit = _CACHE.get(key)
+        if refresh or hit is None or hit[0] != stamp:
+            hit = _CACHE[key] = (stamp, loader())
+        return hit[1]
+
+
+def _invalidate_cache(key: str) -> None:
+    with _cache_lock:
+        _CACHE.pop(key, None)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Schema
 # ─────────────────────────────────────────────────────────────────────────────
 def init_db() -> None:
+    """
+    Create/upgrade the schema. Cheap to call repeatedly: later calls in the
+    same process return at once, and a DB already at SCHEMA_VERSION skips
+    the DDL script entirely.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _conn() as c:
+        up_to_date = c.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION
+    if not up_to_date:
+        _create_schema()
+        # Migrate existing DBs that are missing the new columns
+        _migrate()
+    _init_fts()
+    _initialized = True
+
+
+def _create_schema() -> None:
     with _conn() as c:
+        # executescript() COMMITs the pending BEGIN IMMEDIATE before running, so
+        # the script opens its own transaction to keep the DDL atomic; on error
+        # _conn() rolls the still-open transaction back
         c.executescript("""
+        BEGIN IMMEDIATE;
         CREATE TABLE IF NOT EXISTS vehicles (
             vin              TEXT PRIMARY KEY,
             title            TEXT,
@@ -51,11 +209,12 @@ def init_db() -> None:
             link             TEXT    DEFAULT '',
             first_seen       TEXT    NOT NULL,
             last_seen        TEXT    NOT NULL,
-            is_active        INTEGER DEFAULT 1,
+            is_active        INTEGER NOT NULL DEFAULT 1,
             price_override   INTEGER,
             addendum_override INTEGER,
             market_value     INTEGER,
-            notes            TEXT    DEFAULT ''
+            notes            TEXT    DEFAULT '',
+            price_scrape_attempts INTEGER NOT NULL DEFAULT 0
         );
 
         CREATE TABLE IF NOT EXISTS sync_runs (
@@ -71,9 +230,9 @@ def init_db() -> None:
         CREATE TABLE IF NOT EXISTS vehicle_stats (
             vin          TEXT NOT NULL,
             stat_date    TEXT NOT NULL,
-            impressions  INTEGER DEFAULT 0,
-            clicks       INTEGER DEFAULT 0,
-            saves        INTEGER DEFAULT 0,
+            impressions  INTEGER NOT NULL DEFAULT 0,
+            clicks       INTEGER NOT NULL DEFAULT 0,
+            saves        INTEGER NOT NULL DEFAULT 0,
             PRIMARY KEY (vin, stat_date)
         );
 
@@ -84,16 +243,80 @@ def init_db() -> None:
 
         CREATE INDEX IF NOT EXISTS idx_vs_vin   ON vehicle_stats(vin);
         CREATE INDEX IF NOT EXISTS idx_vs_date  ON vehicle_stats(stat_date);
-        CREATE INDEX IF NOT EXISTS idx_v_make   ON vehicles(make);
-        CREATE INDEX IF NOT EXISTS idx_v_active ON vehicles(is_active);
+        -- Superseded by the compound indexes below (each is a prefix of one)
+        DROP INDEX IF EXISTS idx_v_make;
+        DROP INDEX IF EXISTS idx_v_active;
+
+        -- get_vehicles: WHERE is_active=1 [AND make=? COLLATE NOCASE]
+        --               ORDER BY make COLLATE NOCASE, year DESC, model
+        DROP INDEX IF EXISTS idx_v_active_make_year_model;
+        CREATE INDEX IF NOT EXISTS idx_v_active_make_nc_year_model
+            ON vehicles(is_active, make COLLATE NOCASE, year DESC, model);
+        -- get_summary breakdowns / dropdowns over active vehicles only
+        CREATE INDEX IF NOT EXISTS idx_v_active_year ON vehicles(year)       WHERE is_active=1;
+        CREATE INDEX IF NOT EXISTS idx_v_active_body ON vehicles(body_style) WHERE is_active=1;
+        -- get_comparable_vehicles: same make + model, active, year window
+        DROP INDEX IF EXISTS idx_v_make_model_year;
+        CREATE INDEX IF NOT EXISTS idx_v_make_model_active_year ON vehicles(make, model, is_active, year);
+
+        ANALYZE;
+        COMMIT;
         """)
 
-    # Migrate existing DBs that are missing the new columns
-    _migrate()
+
+def _init_fts() -> None:
+    """
+    Create the vehicles_fts search index (kept in sync by triggers) and
+    backfill it on first creation. The trigram tokenizer keeps the old
+    LIKE '%term%' substring semantics — e.g. the tail of a VIN still matches.
+    If this SQLite build lacks FTS5/trigram, search stays on LIKE.
+    """
+    global _FTS_ENABLED
+    with _conn() as c:
+        if not c.execute("SELECT 1 FROM sqlite_master WHERE name='vehicles_fts'").fetchone():
+            try:
+                c.execute("""
+                    CREATE VIRTUAL TABLE vehicles_fts
+                    USING fts5(vin, title, stock_number, model, tokenize='trigram')
+                """)
+            except sqlite3.OperationalError:
+                _FTS_ENABLED = False
+                return
+            c.execute("""
+                INSERT INTO vehicles_fts (vin, title, stock_number, model)
+                SELECT vin, title, stock_number, model FROM vehicles
+            """)
+        c.execute("""
+            CREATE TRIGGER IF NOT EXISTS vehicles_fts_ai AFTER INSERT ON vehicles BEGIN
+                INSERT INTO vehicles_fts (vin, title, stock_number, model)
+                VALUES (new.vin, new.title, new.stock_number, new.model);
+            END
+        """)
+        c.execute("""
+            CREATE TRIGGER IF NOT EXISTS vehicles_fts_ad AFTER DELETE ON vehicles BEGIN
+                DELETE FROM vehicles_fts WHERE vin = old.vin;
+            END
+        """)
+        # Every sync re-sets these columns; only touch the index on a real change
+        c.execute("""
+            CREATE TRIGGER IF NOT EXISTS vehicles_fts_au AFTER UPDATE OF title, stock_number, model ON vehicles
+            WHEN old.title IS NOT new.title
+              OR old.stock_number IS NOT new.stock_number
+              OR old.model IS NOT new.model
+            BEGIN
+                DELETE FROM vehicles_fts WHERE vin = old.vin;
+                INSERT INTO vehicles_fts (vin, title, stock_number, model)
+                VALUES (new.vin, new.title, new.stock_number, new.model);
+            END
+        """)
+    _FTS_ENABLED = True
 
 
 def _migrate() -> None:
-    """Add new columns to existing databases without breaking anything."""
+    """
+    Add new columns to existing databases without breaking anything.
+    A no-op once the DB's user_version has reached SCHEMA_VERSION.
+    """
     migrations = [
         "ALTER TABLE vehicles ADD COLUMN price_override       INTEGER",
         "ALTER TABLE vehicles ADD COLUMN addendum_override    INTEGER",
@@ -102,20 +325,38 @@ def _migrate() -> None:
         "ALTER TABLE vehicles ADD COLUMN price_scrape_attempts INTEGER DEFAULT 0",
     ]
     with _conn() as c:
+        if c.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
         for sql in migrations:
             try:
                 c.execute(sql)
             except sqlite3.OperationalError:
                 pass  # column already exists — that's fine
+        # Older tables declare these nullable; new ones are NOT NULL DEFAULT.
+        # Backfill so readers can rely on a value without COALESCE.
+        c.execute("UPDATE vehicles SET price_scrape_attempts=0 WHERE price_scrape_attempts IS NULL")
+        c.execute("UPDATE vehicles SET is_active=1 WHERE is_active IS NULL")
+        c.execute("""
+            UPDATE vehicle_stats SET
+                impressions = COALESCE(impressions, 0),
+                clicks      = COALESCE(clicks, 0),
+                saves       = COALESCE(saves, 0)
+            WHERE impressions IS NULL OR clicks IS NULL OR saves IS NULL
+        """)
+        c.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Settings
 # ─────────────────────────────────────────────────────────────────────────────
+def _load_settings() -> dict[str, str]:
+    with _conn_ro() as c:
+        rows = c.execute("SELECT key, value FROM settings").fetchall()
+    return dict(rows)
+
+
 def get_setting(key: str, default: str = "") -> str:
-    with _conn() as c:
-        row = c.execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
-    return row["value"] if row else default
+    return _cached("settings", _load_settings).get(key, default)
 
 
 def set_setting(key: str, value: str) -> None:
@@ -124,6 +365,7 @@ def set_setting(key: str, value: str) -> None:
             INSERT INTO settings (key, value) VALUES (?,?)
             ON CONFLICT(key) DO UPDATE SET value=excluded.value
         """, (key, value))
+    _invalidate_cache("settings")
 
 
 def get_all_settings(env_addendum: int = 0) -> dict:
@@ -139,16 +381,40 @@ def get_all_settings(env_addendum: int = 0) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # Price-scrape attempt tracking
 # ─────────────────────────────────────────────────────────────────────────────
+def _supports_json_batch() -> bool:
+    """UPDATE … FROM needs SQLite 3.33+; json_each needs the JSON1 extension."""
+    if sqlite3.sqlite_version_info < (3, 33, 0):
+        return False
+    probe = sqlite3.connect(":memory:")
+    try:
+        probe.execute("SELECT * FROM json_each('[]')")
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+# Batches are passed as one JSON parameter: constant SQL text, no variable limit
+_JSON_BATCH = _supports_json_batch()
+
+
 def get_scrape_attempts(vins: list[str]) -> dict[str, int]:
     """Return {vin: price_scrape_attempts} for the given VINs."""
     if not vins:
         return {}
-    placeholders = ",".join("?" * len(vins))
-    with _conn() as c:
-        rows = c.execute(
-            f"SELECT vin, COALESCE(price_scrape_attempts,0) FROM vehicles WHERE vin IN ({placeholders})",
-            vins,
-        ).fetchall()
+    with _conn_ro() as c:
+        if _JSON_BATCH:
+            rows = c.execute("""
+                SELECT v.vin, v.price_scrape_attempts
+                FROM json_each(?) j JOIN vehicles v ON v.vin = j.value
+            """, (json.dumps(vins),)).fetchall()
+        else:
+            placeholders = ",".join("?" * len(vins))
+            rows = c.execute(
+                f"SELECT vin, price_scrape_attempts FROM vehicles WHERE vin IN ({placeholders})",
+                vins,
+            ).fetchall()
     return {r[0]: r[1] for r in rows}
 
 
@@ -156,79 +422,145 @@ def update_scrape_attempts(updates: dict[str, int]) -> None:
     """Bulk-update price_scrape_attempts. Pass {vin: new_count}."""
     if not updates:
         return
+    counts = {vin: max(0, count) for vin, count in updates.items()}
     with _conn() as c:
-        for vin, count in updates.items():
-            c.execute(
+        if _JSON_BATCH:
+            c.execute("""
+                UPDATE vehicles SET price_scrape_attempts = j.value
+                FROM json_each(?) j
+                WHERE vehicles.vin = j.key
+            """, (json.dumps(counts),))
+        else:
+            c.executemany(
                 "UPDATE vehicles SET price_scrape_attempts=? WHERE vin=?",
-                (max(0, count), vin),
+                [(count, vin) for vin, count in counts.items()],
             )
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Vehicles
 # ─────────────────────────────────────────────────────────────────────────────
-def upsert_vehicles(vehicle_rows: list[dict]) -> None:
+def _utc_now() -> datetime:
+    """Naive UTC time, stored in the same format datetime.utcnow() (deprecated in 3.12) gave."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_PRICE_RE = re.compile(r"(\d+)")
+
+
+def _parse_price(price) -> int | None:
+    """'24995 USD' → 24995. Positive ints pass straight through; blanks → None."""
+    if not price:
+        return None
+    if type(price) is int:   # not bool; negatives never matched the regex either
+        return price if price > 0 else None
+    # Fast path for the sync's own "NNNNN USD" shape; anything else uses the regex
+    head = str(price).partition(" ")[0]
+    if head.isdecimal():
+        return int(head)
+    m = _PRICE_RE.match(str(price))
+    return int(m.group(1)) if m else None
+
+
+def _parse_year(year) -> int | None:
+    if not year:
+        return None
+    if type(year) is int:
+        return year
+    # isdecimal, not isdigit: "²".isdigit() is True but int("²") raises
+    if isinstance(year, str) and year.isdecimal():
+        return int(year)
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+def upsert_vehicles(vehicle_rows: Iterable[dict]) -> None:
     """
     Upsert vehicles from a sync run.
     Marks vehicles no longer in the feed as inactive.
     Does NOT overwrite user-set fields (price_override, addendum_override,
     market_value, notes).
     """
-    now = datetime.utcnow().isoformat(timespec="seconds")
-
-    with _conn() as c:
-        c.execute("UPDATE vehicles SET is_active = 0 WHERE is_active = 1")
-
-        for v in vehicle_rows:
-            vin = v.get("vin", "")
-            if not vin:
-                continue
-
-            price_dollars: int | None = None
-            if v.get("price"):
-                m = re.match(r"(\d+)", str(v["price"]))
-                if m:
-                    price_dollars = int(m.group(1))
+    now = _utc_now().isoformat(timespec="seconds")
+
+    params: list[tuple] = []
+    for v in vehicle_rows:
+        vin = v.get("vin", "")
+        if not vin:
+            continue
+
+        # first_seen is only written on INSERT — the ON CONFLICT branch
+        # leaves it untouched, so existing rows keep their original date
+        params.append((
+            vin, v.get("title",""), v.get("stock_number", vin),
+            _parse_year(v.get("year")), v.get("make",""), v.get("model",""), v.get("trim",""),
+            v.get("condition","used"), v.get("body_style",""),
+            int(v.get("mileage") or 0), v.get("exterior_color",""),
+            _parse_price(v.get("price")), v.get("image_url",""), v.get("link",""),
+            now, now,
+        ))
 
-            row = c.execute("SELECT first_seen FROM vehicles WHERE vin = ?", (vin,)).fetchone()
-            first_seen = row["first_seen"] if row else now
-
-            year = v.get("year")
-            try:
-                year = int(year) if year else None
-            except (TypeError, ValueError):
-                year = None
+    incoming = [p[0] for p in params]
 
+    with _conn() as c:
+        # Only flip rows that actually left the feed instead of deactivating
+        # everything and re-activating it again in the upsert
+        if _JSON_BATCH:
             c.execute("""
-                INSERT INTO vehicles
-                    (vin, title, stock_number, year, make, model, trim,
-                     condition, body_style, mileage, exterior_color,
-                     price_dollars, image_url, link, first_seen, last_seen, is_active)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,1)
-                ON CONFLICT(vin) DO UPDATE SET
-                    title          = excluded.title,
-                    stock_number   = excluded.stock_number,
-                    year           = excluded.year,
-                    make           = excluded.make,
-                    model          = excluded.model,
-                    trim           = excluded.trim,
-                    condition      = excluded.condition,
-                    body_style     = excluded.body_style,
-                    mileage        = excluded.mileage,
-                    exterior_color = excluded.exterior_color,
-                    price_dollars  = excluded.price_dollars,
-                    image_url      = excluded.image_url,
-                    link           = excluded.link,
-                    last_seen      = excluded.last_seen,
-                    is_active      = 1
-            """, (
-                vin, v.get("title",""), v.get("stock_number", vin),
-                year, v.get("make",""), v.get("model",""), v.get("trim",""),
-                v.get("condition","used"), v.get("body_style",""),
-                int(v.get("mileage") or 0), v.get("exterior_color",""),
-                price_dollars, v.get("image_url",""), v.get("link",""),
-                first_seen, now,
-            ))
+                UPDATE vehicles SET is_active = 0
+                WHERE is_active = 1 AND vin NOT IN (SELECT value FROM json_each(?))
+            """, (json.dumps(incoming),))
+        else:
+            current = {vin for (vin,) in c.execute("SELECT vin FROM vehicles WHERE is_active = 1")}
+            c.executemany(
+                "UPDATE vehicles SET is_active = 0 WHERE vin = ?",
+                [(vin,) for vin in current.difference(incoming)],
+            )
+        c.executemany("""
+            INSERT INTO vehicles
+                (vin, title, stock_number, year, make, model, trim,
+                 condition, body_style, mileage, exterior_color,
+                 price_dollars, image_url, link, first_seen, last_seen, is_active)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,1)
+            ON CONFLICT(vin) DO UPDATE SET
+                title          = excluded.title,
+                stock_number   = excluded.stock_number,
+                year           = excluded.year,
+                make           = excluded.make,
+                model          = excluded.model,
+                trim           = excluded.trim,
+                condition      = excluded.condition,
+                body_style     = excluded.body_style,
+                mileage        = excluded.mileage,
+                exterior_color = excluded.exterior_color,
+                price_dollars  = excluded.price_dollars,
+                image_url      = excluded.image_url,
+                link           = excluded.link,
+                last_seen      = excluded.last_seen,
+                is_active      = 1
+        """, params)
+
+        # A big sync shifts the row distribution — refresh sqlite_stat1 now
+        if len(params) > ANALYZE_THRESHOLD:
+            c.execute("ANALYZE vehicles")
+
+    # The active set just changed — drop the dropdown cache; readers reload it
+    # lazily (the sync subprocess never serves get_makes/get_years itself)
+    _invalidate_cache("filters")
+    _invalidate_cache("summary")
+
+
+# User-editable columns, sorted — combinations() of a sorted tuple stay sorted
+_EDITABLE_FIELDS = ("addendum_override", "market_value", "notes", "price_override")
+
+# UPDATE statement for every non-empty subset, keyed by its sorted column tuple
+_UPDATE_SQL = {
+    keys: "UPDATE vehicles SET " + ", ".join(f"{k}=?" for k in keys) + " WHERE vin=?"
+    for n in range(1, len(_EDITABLE_FIELDS) + 1)
+    for keys in combinations(_EDITABLE_FIELDS, n)
+}
 
 
 def update_vehicle_fields(vin: str, fields: dict) -> bool:
@@ -238,18 +570,19 @@ def update_vehicle_fields(vin: str, fields: dict) -> bool:
     Pass None to clear a numeric override.
     Returns True if a row was updated.
     """
-    allowed = {"price_override", "addendum_override", "market_value", "notes"}
-    updates = {k: v for k, v in fields.items() if k in allowed}
+    updates = {k: v for k, v in fields.items() if k in _EDITABLE_FIELDS}
     if not updates:
         return False
-    set_clause = ", ".join(f"{k}=?" for k in updates)
-    params = list(updates.values()) + [vin]
+    keys = tuple(sorted(updates))
+    params = [updates[k] for k in keys] + [vin]
     with _conn() as c:
-        cur = c.execute(f"UPDATE vehicles SET {set_clause} WHERE vin=?", params)
+        cur = c.execute(_UPDATE_SQL[keys], params)
+    _invalidate_cache("summary")
     return cur.rowcount > 0
 
 
 def record_sync_run(run: dict) -> None:
+    run_at = run["run_at"] if "run_at" in run else _utc_now().isoformat(timespec="seconds")
     with _conn() as c:
         c.execute("""
             INSERT INTO sync_runs
@@ -257,91 +590,172 @@ def record_sync_run(run: dict) -> None:
                  vehicles_uploaded, duration_seconds, success)
             VALUES (?,?,?,?,?,?)
         """, (
-            run.get("run_at", datetime.utcnow().isoformat(timespec="seconds")),
+            run_at,
             run.get("vehicles_found", 0),
             run.get("vehicles_priced", 0),
             run.get("vehicles_uploaded", 0),
             round(run.get("duration_seconds", 0), 2),
             1 if run.get("success") else 0,
         ))
+    _invalidate_cache("summary")
 
 
 def upsert_vehicle_stats(stats: list[dict]) -> None:
-    today = datetime.utcnow().strftime("%Y-%m-%d")
+    today = _utc_now().strftime("%Y-%m-%d")
+    params = [
+        (
+            s["vin"], today,
+            int(s.get("impressions", 0)),
+            int(s.get("clicks", 0)),
+            int(s.get("saves", 0)),
+        )
+        for s in stats
+    ]
     with _conn() as c:
-        for s in stats:
-            c.execute("""
-                INSERT INTO vehicle_stats (vin, stat_date, impressions, clicks, saves)
-                VALUES (?,?,?,?,?)
-                ON CONFLICT(vin, stat_date) DO UPDATE SET
-                    impressions=excluded.impressions,
-                    clicks=excluded.clicks,
-                    saves=excluded.saves
-            """, (
-                s["vin"], today,
-                int(s.get("impressions", 0)),
-                int(s.get("clicks", 0)),
-                int(s.get("saves", 0)),
-            ))
+        c.executemany("""
+            INSERT INTO vehicle_stats (vin, stat_date, impressions, clicks, saves)
+            VALUES (?,?,?,?,?)
+            ON CONFLICT(vin, stat_date) DO UPDATE SET
+                impressions=excluded.impressions,
+                clicks=excluded.clicks,
+                saves=excluded.saves
+            -- Re-polling unchanged numbers should not rewrite the row (or its WAL page)
+            WHERE impressions != excluded.impressions
+               OR clicks      != excluded.clicks
+               OR saves       != excluded.saves
+        """, params)
+    _invalidate_cache("summary")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Queries
 # ─────────────────────────────────────────────────────────────────────────────
-def get_vehicles(
-    make: str = "",
-    condition: str = "",
-    body_style: str = "",
-    year: str = "",
-    search: str = "",
-    active_only: bool = True,
-) -> list[dict]:
-    filters: list[str] = []
-    params:  list      = []
+def _rows_to_dicts(cur: sqlite3.Cursor) -> list[dict]:
+    """Materialise a result set as dicts, resolving column names once per query."""
+    cols = tuple(d[0] for d in cur.description)
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+# Canonical WHERE fragments for get_vehicles, in the order they are applied
+_VEHICLE_FILTERS = {
+    # COLLATE NOCASE matches LOWER()=LOWER() (both fold ASCII only) but lets
+    # the make filter seek idx_v_active_make_nc_year_model
+    "make":       "v.make = ? COLLATE NOCASE",
+    "condition":  "v.condition = ? COLLATE NOCASE",
+    "body_style": "v.body_style = ? COLLATE NOCASE",
+    "year":       "v.year = ?",
+    # Trigram phrase query = case-insensitive substring match on any column
+    "fts":        "v.vin IN (SELECT vin FROM vehicles_fts WHERE vehicles_fts MATCH ?)",
+    "like":       "(v.title LIKE ? OR v.vin LIKE ? OR v.stock_number LIKE ? OR v.model LIKE ?)",
+}
+
+
+@lru_cache(maxsize=64)
+def _vehicles_sql(filter_key: tuple[str, ...], active_only: bool, paged: bool = False) -> str:
+    """
+    SQL for get_vehicles with the given filters active. The text is stable per
+    filter combination, so each connection's statement cache reuses the prepared plan.
+    """
+    filters = ["v.is_active = 1"] if active_only else []
+    filters += [_VEHICLE_FILTERS[k] for k in filter_key]
+    where = "WHERE " + " AND ".join(filters) if filters else ""
+    return f"""
+        SELECT
+            v.*,
+            COALESCE(s.impressions, 0) AS fb_impressions,
+            COALESCE(s.clicks,      0) AS fb_clicks,
+            COALESCE(s.saves,       0) AS fb_saves,
+            s.stat_date                AS stats_date
+        FROM   vehicles v
+        LEFT JOIN vehicle_stats s ON s.vin = v.vin AND s.stat_date = ?
+        {where}
+        ORDER BY v.make COLLATE NOCASE, v.year DESC, v.model
+        {"LIMIT ? OFFSET ?" if paged else ""}
+    """
+
+
+@lru_cache(maxsize=64)
+def _count_vehicles_sql(filter_key: tuple[str, ...], active_only: bool) -> str:
+    """COUNT(*) twin of _vehicles_sql — same filters, no stats join or sort."""
+    filters = ["v.is_active = 1"] if active_only else []
+    filters += [_VEHICLE_FILTERS[k] for k in filter_key]
+    where = "WHERE " + " AND ".join(filters) if filters else ""
+    return f"SELECT COUNT(*) FROM vehicles v {where}"
+
+
+def _vehicle_filter_params(
+    make: str, condition: str, body_style: str, year: str, search: str,
+) -> tuple[tuple[str, ...], list]:
+    """Filter keys (for _vehicles_sql) and their bind values, in matching order."""
+    keys:   list[str] = []
+    params: list      = []
 
-    if active_only:
-        filters.append("v.is_active = 1")
     if make:
-        filters.append("LOWER(v.make) = LOWER(?)")
+        keys.append("make")
         params.append(make)
     if condition:
-        filters.append("LOWER(v.condition) = LOWER(?)")
+        keys.append("condition")
         params.append(condition)
     if body_style:
-        filters.append("LOWER(v.body_style) = LOWER(?)")
+        keys.append("body_style")
         params.append(body_style)
     if year:
         try:
-            filters.append("v.year = ?")
             params.append(int(year))
+            keys.append("year")
         except ValueError:
             pass
     if search:
-        filters.append("(v.title LIKE ? OR v.vin LIKE ? OR v.stock_number LIKE ? OR v.model LIKE ?)")
-        s = f"%{search}%"
-        params.extend([s, s, s, s])
+        if _FTS_ENABLED and len(search) >= 3:
+            keys.append("fts")
+            params.append('"' + search.replace('"', '""') + '"')
+        else:
+            # Trigrams need 3+ characters; short terms use the plain scan
+            keys.append("like")
+            s = f"%{search}%"
+            params.extend([s, s, s, s])
+    return tuple(keys), params
 
-    where = "WHERE " + " AND ".join(filters) if filters else ""
 
-    sql = f"""
-        SELECT
-            v.*,
-            COALESCE(s.impressions, 0) AS fb_impressions,
-            COALESCE(s.clicks,      0) AS fb_clicks,
-            COALESCE(s.saves,       0) AS fb_saves,
-            s.stat_date                AS stats_date
-        FROM   vehicles v
-        LEFT JOIN (
-            SELECT vin, impressions, clicks, saves, stat_date
-            FROM   vehicle_stats
-            WHERE  stat_date = (SELECT MAX(stat_date) FROM vehicle_stats)
-        ) s ON s.vin = v.vin
-        {where}
-        ORDER BY v.make, v.year DESC, v.model
+def get_vehicles(
+    make: str = "",
+    condition: str = "",
+    body_style: str = "",
+    year: str = "",
+    search: str = "",
+    active_only: bool = True,
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[dict]:
     """
-    with _conn() as c:
-        rows = c.execute(sql, params).fetchall()
-    return [dict(r) for r in rows]
+    Vehicles matching the filters, with their latest FB stats. Pass limit
+    and/or offset to fetch one page; the sort index lets SQLite stop early.
+    """
+    keys, params = _vehicle_filter_params(make, condition, body_style, year, search)
+    paged = limit is not None or offset > 0
+
+    with _conn_ro() as c:
+        # Bound up front so the stats join is a primary-key seek per vehicle
+        max_date = c.execute("SELECT MAX(stat_date) FROM vehicle_stats").fetchone()[0]
+        if paged:
+            # LIMIT -1 means "no limit" in SQLite, so a bare offset still applies
+            params.extend([-1 if limit is None else limit, offset])
+        cur = c.execute(_vehicles_sql(keys, active_only, paged), [max_date, *params])
+        return _rows_to_dicts(cur)
+
+
+def count_vehicles(
+    make: str = "",
+    condition: str = "",
+    body_style: str = "",
+    year: str = "",
+    search: str = "",
+    active_only: bool = True,
+) -> int:
+    """Number of vehicles get_vehicles would return for these filters, ignoring paging."""
+    keys, params = _vehicle_filter_params(make, condition, body_style, year, search)
+    with _conn_ro() as c:
+        return c.execute(_count_vehicles_sql(keys, active_only), params).fetchone()[0]
 
 
 def get_comparable_vehicles(vin: str, limit: int = 8) -> list[dict]:
@@ -349,100 +763,122 @@ def get_comparable_vehicles(vin: str, limit: int = 8) -> list[dict]:
     Return active vehicles with the same make+model within ±4 model years,
     excluding the vehicle itself. Used for market comparison and duplicate detection.
     """
-    with _conn() as c:
+    with _conn_ro() as c:
         target = c.execute("SELECT make, model, year, trim FROM vehicles WHERE vin=?", (vin,)).fetchone()
         if not target:
             return []
-        rows = c.execute("""
+        make, model, year, trim = target
+        # A BETWEEN range (rather than ABS(year - ?) <= 4) lets the index seek
+        # straight to the year window; an unknown year compares against everything
+        window = "" if year is None else "AND year BETWEEN ? AND ?"
+        window_params = () if year is None else (year - 4, year + 4)
+        # Near-duplicates: same year + trim (IS so a NULL year matches NULL)
+        cur = c.execute(f"""
             SELECT
                 vin, title, year, make, model, trim, condition, body_style,
                 mileage, exterior_color, image_url, link,
                 COALESCE(price_override, price_dollars) AS effective_price,
-                price_override, price_dollars, market_value, is_active
+                price_override, price_dollars, market_value, is_active,
+                (year IS ? AND LOWER(COALESCE(trim,'')) = LOWER(COALESCE(?,''))) AS is_near_duplicate
             FROM vehicles
             WHERE make = ?
               AND model = ?
               AND vin != ?
               AND is_active = 1
-              AND (? IS NULL OR ABS(year - ?) <= 4)
+              {window}
             ORDER BY ABS(year - COALESCE(?,0)) ASC, year DESC
             LIMIT ?
         """, (
-            target["make"], target["model"], vin,
-            target["year"], target["year"],
-            target["year"], limit,
-        )).fetchall()
-    results = []
-    for r in rows:
-        d = dict(r)
-        # Flag near-duplicates: same year + trim
-        d["is_near_duplicate"] = (
-            r["year"] == target["year"] and
-            (r["trim"] or "").lower() == (target["trim"] or "").lower()
-        )
-        results.append(d)
-    return results
+            year, trim,
+            make, model, vin,
+            *window_params,
+            year, limit,
+        ))
+        rows = _rows_to_dicts(cur)
+    # SQLite hands the comparison back as 0/1; the API has always sent a JSON bool
+    for d in rows:
+        d["is_near_duplicate"] = bool(d["is_near_duplicate"])
+    return rows
 
 
-def get_summary(addendum: int = 0) -> dict:
-    with _conn() as c:
-        total   = c.execute("SELECT COUNT(*) FROM vehicles WHERE is_active=1").fetchone()[0]
-        priced  = c.execute("SELECT COUNT(*) FROM vehicles WHERE is_active=1 AND (price_override IS NOT NULL OR price_dollars IS NOT NULL)").fetchone()[0]
-        avg_row = c.execute("""
-            SELECT AVG(COALESCE(price_override, price_dollars))
-            FROM vehicles
-            WHERE is_active=1 AND (price_override IS NOT NULL OR price_dollars IS NOT NULL)
-        """).fetchone()
-        avg_p   = round(avg_row[0] or 0)
-
-        makes_rows  = c.execute("SELECT make, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND make!='' GROUP BY make ORDER BY cnt DESC").fetchall()
-        bodies_rows = c.execute("SELECT body_style, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND body_style!='' GROUP BY body_style ORDER BY cnt DESC").fetchall()
-        years_rows  = c.execute("SELECT year, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND year IS NOT NULL GROUP BY year ORDER BY year DESC").fetchall()
-        with_mv     = c.execute("SELECT COUNT(*) FROM vehicles WHERE is_active=1 AND market_value IS NOT NULL").fetchone()[0]
-
-        last_run  = c.execute("SELECT run_at, success, vehicles_found, vehicles_uploaded FROM sync_runs ORDER BY id DESC LIMIT 1").fetchone()
-        stats_s   = c.execute("""
-            SELECT COALESCE(SUM(clicks),0), COALESCE(SUM(impressions),0), COALESCE(SUM(saves),0)
-            FROM vehicle_stats
-            WHERE stat_date = (SELECT MAX(stat_date) FROM vehicle_stats)
-        """).fetchone()
-        stats_date = c.execute("SELECT MAX(stat_date) FROM vehicle_stats").fetchone()[0]
+def _load_summary() -> dict:
+    """Dashboard summary with no addendum applied; get_summary() fills that in."""
+    with _conn_ro() as c:
+        c.execute("BEGIN")   # one read snapshot shared by every query below
+        try:
+            totals = c.execute("""
+                SELECT COUNT(*)                                       AS total,
+                       COUNT(COALESCE(price_override, price_dollars)) AS priced,
+                       AVG(COALESCE(price_override, price_dollars))   AS avg_price,
+                       COUNT(market_value)                            AS with_mv
+                FROM   vehicles
+                WHERE  is_active=1
+            """).fetchone()
+
+            makes_rows  = c.execute("SELECT make, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND make!='' GROUP BY make ORDER BY cnt DESC").fetchall()
+            bodies_rows = c.execute("SELECT body_style, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND body_style!='' GROUP BY body_style ORDER BY cnt DESC").fetchall()
+            years_rows  = c.execute("SELECT year, COUNT(*) cnt FROM vehicles WHERE is_active=1 AND year IS NOT NULL GROUP BY year ORDER BY year DESC").fetchall()
+
+            last_run   = c.execute("SELECT run_at, success, vehicles_found, vehicles_uploaded FROM sync_runs ORDER BY id DESC LIMIT 1").fetchone()
+            clicks, impressions, saves, stats_date = c.execute("""
+                SELECT COALESCE(SUM(clicks),0), COALESCE(SUM(impressions),0), COALESCE(SUM(saves),0),
+                       MAX(stat_date)
+                FROM vehicle_stats
+                WHERE stat_date = (SELECT MAX(stat_date) FROM vehicle_stats)
+            """).fetchone()
+        finally:
+            c.rollback()
+
+    total, priced, avg_p, with_mv = totals
+    avg_p = round(avg_p or 0)
 
     return {
         "total_active":            total,
         "total_priced":            priced,
         "total_no_price":          total - priced,
         "avg_price":               avg_p,
-        "avg_price_with_addendum": avg_p + addendum,
-        "addendum_amount":         addendum,
+        "avg_price_with_addendum": avg_p,
+        "addendum_amount":         0,
         "vehicles_with_market_value": with_mv,
-        "total_clicks":            stats_s[0] if stats_s else 0,
-        "total_impressions":       stats_s[1] if stats_s else 0,
-        "total_saves":             stats_s[2] if stats_s else 0,
+        "total_clicks":            clicks,
+        "total_impressions":       impressions,
+        "total_saves":             saves,
         "stats_date":              stats_date,
-        "makes_breakdown":         {r["make"]: r["cnt"]       for r in makes_rows},
-        "body_breakdown":          {r["body_style"]: r["cnt"] for r in bodies_rows},
-        "years_breakdown":         {str(r["year"]): r["cnt"]  for r in years_rows},
-        "last_sync_at":            last_run["run_at"]            if last_run else None,
-        "last_sync_ok":            bool(last_run["success"])     if last_run else None,
-        "last_sync_count":         last_run["vehicles_found"]    if last_run else 0,
-        "last_sync_uploaded":      last_run["vehicles_uploaded"] if last_run else 0,
+        "makes_breakdown":         dict(makes_rows),
+        "body_breakdown":          dict(bodies_rows),
+        "years_breakdown":         {str(y): cnt for y, cnt in years_rows},
+        "last_sync_at":            last_run[0]       if last_run else None,
+        "last_sync_ok":            bool(last_run[1]) if last_run else None,
+        "last_sync_count":         last_run[2]       if last_run else 0,
+        "last_sync_uploaded":      last_run[3]       if last_run else 0,
+    }
+
+
+def get_summary(addendum: int = 0) -> dict:
+    summary = _cached("summary", _load_summary)
+    return {
+        **summary,
+        "avg_price_with_addendum": summary["avg_price"] + addendum,
+        "addendum_amount":         addendum,
     }
 
 
 def get_sync_runs(limit: int = 20) -> list[dict]:
-    with _conn() as c:
-        rows = c.execute("SELECT * FROM sync_runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
-    return [dict(r) for r in rows]
+    with _conn_ro() as c:
+        return _rows_to_dicts(c.execute("SELECT * FROM sync_runs ORDER BY id DESC LIMIT ?", (limit,)))
+
+
+def _load_filter_values() -> tuple[list[str], list[int]]:
+    """Distinct makes and years across active vehicles, for the filter dropdowns."""
+    with _conn_ro() as c:
+        makes = c.execute("SELECT DISTINCT make FROM vehicles WHERE is_active=1 AND make!='' ORDER BY make").fetchall()
+        years = c.execute("SELECT DISTINCT year FROM vehicles WHERE is_active=1 AND year IS NOT NULL ORDER BY year DESC").fetchall()
+    return [m for (m,) in makes], [y for (y,) in years]
 
 
 def get_makes() -> list[str]:
-    with _conn() as c:
-        rows = c.execute("SELECT DISTINCT make FROM vehicles WHERE is_active=1 AND make!='' ORDER BY make").fetchall()
-    return [r["make"] for r in rows]
+    return list(_cached("filters", _load_filter_values)[0])
 
 
 def get_years() -> list[int]:
-    with _conn() as c:
-        rows = c.execute("SELECT DISTINCT year FROM vehicles WHERE is_active=1 AND year IS NOT NULL ORDER BY year DESC").fetchall()
-    return [r["year"] for r in rows]
+    return list(_cached("filters", _load_filter_values)[1])
@@ -17,20 +17,41 @@ Setup:
 import argparse
 import asyncio
 import csv
+import hashlib
 import io
 import json
 import os
 import re
 import sys
+import tempfile
 import time
+import uuid
 import xml.etree.ElementTree as ET
-from dataclasses import asdict, dataclass, field
+from xml.sax.saxutils import escape as _xmlesc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from typing import Optional
 
 import requests
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-from playwright.async_api import TimeoutError as PWTimeout
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# lxml's C parser is faster; the stdlib parser is the fallback when it isn't
+# installed. Both fail on malformed or truncated XML — a feed cut off
+# mid-download must not pass its first few items off as the whole inventory.
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+# orjson parses the VDP JSON-LD blobs several times faster than the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 load_dotenv()
 
@@ -62,6 +83,7 @@ CSV_OUTPUT_PATH          = os.getenv("CSV_OUTPUT_PATH", "inventory_feed.csv")
 # Only process RSS URLs whose domain contains this string.
 # Guards against accidentally pulling partner / other-store feeds.
 SA_DOMAIN_FILTER         = os.getenv("SA_DOMAIN_FILTER", "infinitiofsanantonio.com")
+_SA_DOMAIN_LC            = SA_DOMAIN_FILTER.lower()
 
 # DealerOn price selectors — tried in order, first match wins
 PRICE_SELECTORS = [
@@ -78,11 +100,99 @@ PRICE_SELECTORS = [
     "[class*='internet'][class*='price']",
 ]
 
+# ──────────────────────────────────────────────────────────────────────────────
+# HTTP session — keep-alive connections reused across every dealer-site fetch
+# ──────────────────────────────────────────────────────────────────────────────
+_HTTP = requests.Session()
+_HTTP.headers["User-Agent"] = "Mozilla/5.0"
+_http_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    # Retry transient dealer/CDN errors; raise_on_status=False hands the last
+    # response back so raise_for_status() still reports the real status
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], raise_on_status=False),
+)
+_HTTP.mount("https://", _http_adapter)
+_HTTP.mount("http://", _http_adapter)
+
+# Separate session for the Graph API so discovery and feed lookup share one
+# TLS connection to graph.facebook.com
+_GRAPH_BASE = f"https://graph.facebook.com/{FB_API_VERSION}"
+_GRAPH = requests.Session()
+_GRAPH.headers["User-Agent"] = "grubbs-sync/1.0"
+_GRAPH.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    # Graph throttling / 5xx blips are retried with backoff (honouring
+    # Retry-After). POST is included for the batch reads, which are idempotent,
+    # but read=0: a request that timed out may already have been applied. The
+    # last response is still returned so its error body is reported.
+    max_retries=Retry(total=5, read=0, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET", "POST"],
+                      respect_retry_after_header=True, raise_on_status=False),
+))
+# No retries at all, for non-idempotent writes (feed creation) where a repeat
+# after an ambiguous failure would leave duplicates on the catalog
+_GRAPH_ONCE = requests.Session()
+_GRAPH_ONCE.headers["User-Agent"] = "grubbs-sync/1.0"
+# The feed upload only retries a 429: Graph throttled it before taking it. A
+# 5xx may come back after the upload was queued, and re-sending the whole
+# feed could queue it twice
+_GRAPH_UPLOAD = requests.Session()
+_GRAPH_UPLOAD.headers["User-Agent"] = "grubbs-sync/1.0"
+_GRAPH_UPLOAD.mount("https://", HTTPAdapter(
+    max_retries=Retry(total=3, read=0, backoff_factor=0.5,
+                      status_forcelist=[429],
+                      allowed_methods=["POST"],
+                      respect_retry_after_header=True, raise_on_status=False),
+))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Regex patterns — compiled once at import, reused for every feed item / page
+# ──────────────────────────────────────────────────────────────────────────────
+_VIN_DESC_RE  = re.compile(r"VIN#[:\s]+([A-HJ-NPR-Z0-9]{17})", re.I)
+_VIN_LINK_RE  = re.compile(r"([A-HJ-NPR-Z0-9]{17})$")
+_STOCK_RE     = re.compile(r"Stock#[:\s]+(\S+)", re.I)
+_MILEAGE_RE   = re.compile(r"([\d,]+)\s*(?:Miles|mi\.?)\b", re.I)
+_COLOR_RE     = re.compile(r"Exterior Color[:\s]+([^<\n,]+)", re.I)
+# Description price patterns in priority order (labelled > "Price $" > bare $),
+# as one zero-width alternation: finditer visits every position once and the
+# capturing group that matched (lastindex) says which pattern it was
+_RSS_PRICE_RE = re.compile(
+    r"(?=(?:Sale|Internet|Our|Asking|Final|List|MSRP|Retail)\s*Price[:\s]*\$?\s*([\d]{2,3},?[\d]{3})"
+    r"|Price[:\s]*\$\s*([\d]{2,3},?[\d]{3})"
+    r"|\$\s*([\d]{2,3},[\d]{3}))",
+    re.I,
+)
+_IMG_RE       = re.compile(r'src=["\']([^"\']+inventoryphotos[^"\']+)["\']', re.I)
+_THUMB_RE     = re.compile(r"/thumbs/(\d+\.jpg)$")
+_WS_RE        = re.compile(r"\s+")
+_TITLE_RE     = re.compile(r"(\d{4})\s+(\S+)\s+(\S+)\s*(.*)")
+_PRICE_VAL_RE = re.compile(r"\$?\s*([\d]{1,3}(?:,[\d]{3})+|[\d]{4,6})")
+_PRICE_CTX_RE = re.compile(r"(?i)price.{0,200}")
+_PRICE_STR_RE = re.compile(r"(\d+)\s+([A-Z]+)")
+
+# Plausible VDP price range (exclusive), in dollars
+_MIN_PRICE = 2_500
+_MAX_PRICE = 500_000
+
+_DESC_TMPL = (
+    "{title}. "
+    "Stock #{stock}. VIN: {vin}. "
+    "Mileage: {mileage:,} miles. "
+    "Exterior: {color}. "
+    "Used vehicle available at Grubbs INFINITI of San Antonio. "
+    "View full details at {link}"
+)
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Data model
 # ──────────────────────────────────────────────────────────────────────────────
-@dataclass
+@dataclass(slots=True)
 class Vehicle:
     vin:            str
     title:          str
@@ -101,144 +211,179 @@ class Vehicle:
     body_style:     str = ""               # inferred; see _infer_body_style()
 
 
+_VEHICLE_FIELDS = tuple(f.name for f in fields(Vehicle))
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Step 1 — Parse RSS feed
 # ──────────────────────────────────────────────────────────────────────────────
+def _iter_feed_items(raw: bytes):
+    """
+    Yield each <item> of an RSS document as it is parsed, clearing it once
+    the caller moves on so the tree never holds the whole feed at once.
+    """
+    if _lxml_etree is not None:
+        for _, item in _lxml_etree.iterparse(io.BytesIO(raw), events=("end",), tag="item",
+                                             huge_tree=False):
+            yield item
+            item.clear()
+            while item.getprevious() is not None:   # drop already-processed siblings
+                del item.getparent()[0]
+    else:
+        for _, el in ET.iterparse(io.BytesIO(raw), events=("end",)):
+            if el.tag == "item":
+                yield el
+                el.clear()
+
+
+def _parse_item(item, condition: str) -> Optional[Vehicle]:
+    """Turn one RSS <item> element into a Vehicle (None if it should be skipped)."""
+    def txt(tag: str) -> str:
+        el = item.find(tag)
+        if el is None:
+            return ""
+        return (el.text or "").strip()
+
+    # ── SA store filter — skip vehicles whose detail page is on another store ──
+    # Checked on <link> alone, before the bulky description text is pulled out
+    link = txt("link")
+    if _SA_DOMAIN_LC and _SA_DOMAIN_LC not in link.lower():
+        return None
+
+    title            = txt("title")
+    description_html = txt("description")
+
+    # ── VIN ─────────────────────────────────────────────────────────────
+    vin = ""
+    m = _VIN_DESC_RE.search(description_html)
+    if m:
+        vin = m.group(1)
+    if not vin:
+        m = _VIN_LINK_RE.search(link.rstrip("/"))
+        if m:
+            vin = m.group(1)
+    if not vin:
+        return None  # can't identify the vehicle
+
+    # ── Stock number ─────────────────────────────────────────────────────
+    m = _STOCK_RE.search(description_html)
+    stock_number = m.group(1) if m else vin
+
+    # ── Mileage ──────────────────────────────────────────────────────────
+    m = _MILEAGE_RE.search(description_html)
+    mileage = m.group(1).replace(",", "") if m else "0"
+
+    # ── Exterior color ───────────────────────────────────────────────────
+    m = _COLOR_RE.search(description_html)
+    exterior_color = m.group(1).strip() if m else ""
+
+    # ── Price from RSS description ────────────────────────────────────────
+    rss_price: Optional[str] = None
+    # First hit of each pattern; the highest-priority plausible one wins
+    _firsts: list[Optional[int]] = [None, None, None]
+    for _pm in _RSS_PRICE_RE.finditer(description_html):
+        _i = _pm.lastindex - 1
+        if _firsts[_i] is None:
+            _firsts[_i] = int(_pm.group(_i + 1).replace(",", ""))
+            if _i == 0 and 500 < _firsts[0] < 500_000:
+                break
+    for _val in _firsts:
+        if _val is not None and 500 < _val < 500_000:
+            rss_price = f"{_val} USD"
+            break
+
+    # ── Image URL ────────────────────────────────────────────────────────
+    m = _IMG_RE.search(description_html)
+    if m:
+        raw_path = m.group(1)
+        # Upgrade thumbnail path to full-size image
+        full_path = _THUMB_RE.sub(r"/\1", raw_path)
+        image_url = full_path if full_path.startswith("http") else DEALER_BASE_URL + full_path
+    else:
+        image_url = f"{DEALER_BASE_URL}/inventoryphotos/27380/{vin}/ip/1.jpg"
+
+    # ── Year / Make / Model / Trim from title ────────────────────────────
+    title_clean = _WS_RE.sub(" ", title).strip()
+    m = _TITLE_RE.match(title_clean)
+    year = make = model = trim = ""
+    if m:
+        year  = m.group(1)
+        make  = m.group(2)
+        model = m.group(3)
+        trim  = m.group(4).strip()
+
+    description = _DESC_TMPL.format_map({
+        "title": title_clean, "stock": stock_number, "vin": vin,
+        "mileage": int(mileage), "color": exterior_color, "link": link,
+    })
+
+    return Vehicle(
+        vin=vin,
+        title=title_clean,
+        link=link,
+        stock_number=stock_number,
+        mileage=mileage,
+        exterior_color=exterior_color,
+        image_url=image_url,
+        year=year,
+        make=make,
+        model=model,
+        trim=trim,
+        description=description,
+        price=rss_price,
+        condition=condition,
+    )
+
+
 def _parse_rss_feed(url: str, condition: str = "used") -> list[Vehicle]:
     """Fetch one RSS feed URL and return a list of Vehicles."""
-    resp = requests.get(url, timeout=30, headers={"User-Agent": "Mozilla/5.0"})
+    resp = _HTTP.get(url, timeout=30)
     resp.raise_for_status()
 
-    raw = resp.text.lstrip("\ufeff").strip()
-    root = ET.fromstring(raw)
+    # Parse bytes (lxml rejects str input that carries an encoding declaration)
+    raw = resp.content.lstrip(b"\xef\xbb\xbf").strip()
 
     vehicles: list[Vehicle] = []
-    for item in root.findall(".//item"):
-
-        def txt(tag: str) -> str:
-            el = item.find(tag)
-            if el is None:
-                return ""
-            return (el.text or "").strip()
-
-        title            = txt("title")
-        link             = txt("link")
-        description_html = txt("description")
-
-        # ── SA store filter — skip vehicles whose detail page is on another store ──
-        if SA_DOMAIN_FILTER and SA_DOMAIN_FILTER.lower() not in link.lower():
-            continue
-
-        # ── VIN ─────────────────────────────────────────────────────────────
-        vin = ""
-        m = re.search(r"VIN#[:\s]+([A-HJ-NPR-Z0-9]{17})", description_html, re.I)
-        if m:
-            vin = m.group(1)
-        if not vin:
-            m = re.search(r"([A-HJ-NPR-Z0-9]{17})$", link.rstrip("/"))
-            if m:
-                vin = m.group(1)
-        if not vin:
-            continue  # can't identify the vehicle
-
-        # ── Stock number ─────────────────────────────────────────────────────
-        m = re.search(r"Stock#[:\s]+(\S+)", description_html, re.I)
-        stock_number = m.group(1) if m else vin
-
-        # ── Mileage ──────────────────────────────────────────────────────────
-        m = re.search(r"([\d,]+)\s*(?:Miles|mi\.?)\b", description_html, re.I)
-        mileage = m.group(1).replace(",", "") if m else "0"
-
-        # ── Exterior color ───────────────────────────────────────────────────
-        m = re.search(r"Exterior Color[:\s]+([^<\n,]+)", description_html, re.I)
-        exterior_color = m.group(1).strip() if m else ""
-
-        # ── Price from RSS description ────────────────────────────────────────
-        rss_price: Optional[str] = None
-        _price_pats = [
-            r"(?:Sale|Internet|Our|Asking|Final|List|MSRP|Retail)\s*Price[:\s]*\$?\s*([\d]{2,3},?[\d]{3})",
-            r"Price[:\s]*\$\s*([\d]{2,3},?[\d]{3})",
-            r"\$\s*([\d]{2,3},[\d]{3})",
-        ]
-        for _pat in _price_pats:
-            _pm = re.search(_pat, description_html, re.I)
-            if _pm:
-                _val = int(_pm.group(1).replace(",", ""))
-                if 500 < _val < 500_000:
-                    rss_price = f"{_val} USD"
-                    break
-
-        # ── Image URL ────────────────────────────────────────────────────────
-        m = re.search(r'src=["\']([^"\']+inventoryphotos[^"\']+)["\']', description_html, re.I)
-        if m:
-            raw_path = m.group(1)
-            # Upgrade thumbnail path to full-size image
-            full_path = re.sub(r"/thumbs/(\d+\.jpg)$", r"/\1", raw_path)
-            image_url = full_path if full_path.startswith("http") else DEALER_BASE_URL + full_path
-        else:
-            image_url = f"{DEALER_BASE_URL}/inventoryphotos/27380/{vin}/ip/1.jpg"
-
-        # ── Year / Make / Model / Trim from title ────────────────────────────
-        title_clean = re.sub(r"\s+", " ", title).strip()
-        m = re.match(r"(\d{4})\s+(\S+)\s+(\S+)\s*(.*)", title_clean)
-        year = make = model = trim = ""
-        if m:
-            year  = m.group(1)
-            make  = m.group(2)
-            model = m.group(3)
-            trim  = m.group(4).strip()
-
-        description = (
-            f"{title_clean}. "
-            f"Stock #{stock_number}. VIN: {vin}. "
-            f"Mileage: {int(mileage):,} miles. "
-            f"Exterior: {exterior_color}. "
-            f"Used vehicle available at Grubbs INFINITI of San Antonio. "
-            f"View full details at {link}"
-        )
-
-        vehicles.append(Vehicle(
-            vin=vin,
-            title=title_clean,
-            link=link,
-            stock_number=stock_number,
-            mileage=mileage,
-            exterior_color=exterior_color,
-            image_url=image_url,
-            year=year,
-            make=make,
-            model=model,
-            trim=trim,
-            description=description,
-            price=rss_price,
-            condition=condition,
-        ))
-
+    for item in _iter_feed_items(raw):
+        v = _parse_item(item, condition)
+        if v is not None:
+            vehicles.append(v)
     return vehicles
 
 
 def fetch_rss() -> list[Vehicle]:
     """Fetch all configured RSS feeds and return deduplicated vehicles."""
-    seen_vins: set[str] = set()
-    all_vehicles: list[Vehicle] = []
+    feeds: list[tuple[str, str]] = []
     for url in RSS_URLS:
-        label = url.split("/")[-1]   # e.g. rss-usedinventory.aspx
-        if SA_DOMAIN_FILTER and SA_DOMAIN_FILTER.lower() not in url.lower():
+        if _SA_DOMAIN_LC and _SA_DOMAIN_LC not in url.lower():
             print(f"[RSS] SKIP {url} — not San Antonio store (SA_DOMAIN_FILTER={SA_DOMAIN_FILTER})", flush=True)
             continue
+        feeds.append((url, "new" if "newinventory" in url else "used"))
+
+    # Fetch all feeds at once (wall time ≈ slowest feed), then merge in
+    # RSS_URLS order so dedup still keeps the first feed's copy of a VIN
+    with ThreadPoolExecutor(max_workers=max(1, len(feeds))) as pool:
+        futures = [pool.submit(_parse_rss_feed, url, condition=cond) for url, cond in feeds]
+
+    by_vin: dict[str, Vehicle] = {}   # insertion-ordered, first copy of a VIN wins
+    rss_prices = 0
+    for (url, _), future in zip(feeds, futures):
+        label = url.split("/")[-1]   # e.g. rss-usedinventory.aspx
         try:
-            condition = "new" if "newinventory" in url else "used"
-            batch = _parse_rss_feed(url, condition=condition)
-            new = [v for v in batch if v.vin not in seen_vins]
-            seen_vins.update(v.vin for v in new)
-            all_vehicles.extend(new)
-            print(f"[RSS] {label}: {len(batch)} vehicles ({len(new)} new after dedup)", flush=True)
+            batch = future.result()
+            new = 0
+            for v in batch:
+                if v.vin not in by_vin:
+                    by_vin[v.vin] = v
+                    new += 1
+                    if v.price:
+                        rss_prices += 1
+            print(f"[RSS] {label}: {len(batch)} vehicles ({new} new after dedup)", flush=True)
         except Exception as exc:
             print(f"[RSS] WARN — could not fetch {url}: {exc}", flush=True)
 
-    rss_prices = sum(1 for v in all_vehicles if v.price)
-    print(f"[RSS] Total: {len(all_vehicles)} vehicles ({rss_prices} with price in feed)", flush=True)
-    return all_vehicles
+    print(f"[RSS] Total: {len(by_vin)} vehicles ({rss_prices} with price in feed)", flush=True)
+    return list(by_vin.values())
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -246,15 +391,13 @@ def fetch_rss() -> list[Vehicle]:
 # ──────────────────────────────────────────────────────────────────────────────
 def _parse_price_val(text: str) -> Optional[str]:
     """Extract a plausible vehicle price from a string. Returns 'NNNNN USD' or None."""
-    m = re.search(r"\$?\s*([\d]{1,3}(?:,[\d]{3})+|[\d]{4,6})", text)
-    if m:
-        val = int(m.group(1).replace(",", ""))
-        # Exclude model-year values (1900-2035) which appear everywhere on VDP pages
-        if 1900 <= val <= 2035:
-            return None
-        if 2_500 < val < 500_000:
-            return f"{val} USD"
-    return None
+    m = _PRICE_VAL_RE.search(text)
+    if not m:
+        return None
+    val = int(m.group(1).replace(",", ""))
+    # The floor also excludes model-year values (1900-2035), which appear
+    # everywhere on VDP pages
+    return f"{val} USD" if _MIN_PRICE < val < _MAX_PRICE else None
 
 
 async def _price_from_json_ld(page) -> Optional[str]:
@@ -263,7 +406,7 @@ async def _price_from_json_ld(page) -> Optional[str]:
     for script in scripts:
         try:
             content = await script.inner_text()
-            data = json.loads(content)
+            data = _json_loads(content)
             # data may be a list or a single object
             items = data if isinstance(data, list) else [data]
             for item in items:
@@ -344,7 +487,7 @@ async def _scrape_one(page, vehicle: Vehicle) -> Optional[str]:
 
         # 4 — Last resort: scan full page text near the word "price"
         body = await page.inner_text("body")
-        for price_section in re.finditer(r"(?i)price.{0,200}", body):
+        for price_section in _PRICE_CTX_RE.finditer(body):
             result = _parse_price_val(price_section.group())
             if result:
                 return result
@@ -362,9 +505,15 @@ async def scrape_prices(
 ) -> list[Vehicle]:
     """Scrape VDP pages for vehicles that still need a price."""
     skip_vins = skip_vins or set()
-    need_scrape = [v for v in vehicles if not v.price and v.vin not in skip_vins]
-    rss_found   = sum(1 for v in vehicles if v.price)
-    exhausted   = sum(1 for v in vehicles if not v.price and v.vin in skip_vins)
+    need_scrape: list[Vehicle] = []
+    rss_found = exhausted = 0
+    for v in vehicles:
+        if v.price:
+            rss_found += 1
+        elif v.vin in skip_vins:
+            exhausted += 1
+        else:
+            need_scrape.append(v)
     if rss_found:
         print(f"[Playwright] {rss_found}/{len(vehicles)} prices already in RSS — skipping those.", flush=True)
     if exhausted:
@@ -373,6 +522,10 @@ async def scrape_prices(
     if not need_scrape:
         return vehicles
 
+    # Imported here so RSS-only runs (--no-price-scrape, or every price already
+    # in the feed) never load the Playwright package
+    from playwright.async_api import async_playwright
+
     sem = asyncio.Semaphore(PRICE_SCRAPE_CONCURRENCY)
     debug_saved = False
 
@@ -411,7 +564,7 @@ async def scrape_prices(
         await asyncio.gather(*[run_one(ctx, v) for v in need_scrape])
         await browser.close()
 
-    found = sum(1 for v in vehicles if v.price)
+    found = rss_found + sum(1 for v in need_scrape if v.price)
     print(f"\n[Playwright] Prices found: {found}/{len(vehicles)}", flush=True)
     return vehicles
 
@@ -423,60 +576,44 @@ def _price_to_decimal_str(price: Optional[str]) -> str:
     """Convert '24995 USD' → '24995.00 USD' as required by the feed format."""
     if not price:
         return "0.00 USD"
-    m = re.match(r"(\d+)\s+([A-Z]+)", price)
+    m = _PRICE_STR_RE.match(price)
     if m:
         return f"{int(m.group(1)):.2f} {m.group(2)}"
     return price
 
 
-def _infer_body_style(make: str, model: str, trim: str) -> str:
-    """
-    Infer Facebook body_style enum from make/model/trim.
-    Accepted values: CONVERTIBLE, COUPE, CROSSOVER, HATCHBACK,
-                     MINIVAN, SEDAN, SUV, TRUCK, VAN, WAGON, OTHER
-    """
-    text = f"{make} {model} {trim}".upper()
-
+# Body-style keywords, checked in priority order (trucks/vans before SUVs to
+# avoid false matches). Plain substring semantics — each group is compiled
+# into one alternation so a vehicle costs one scan per style, not one per keyword.
+_BODY_STYLE_KEYWORDS: list[tuple[str, tuple[str, ...]]] = [
     # Trucks
-    if any(x in text for x in [
+    ("TRUCK", (
         "F-150", "F150", "F-250", "F250", "F-350", "F350",
         "SILVERADO", "SIERRA", " RAM ", "TUNDRA", "TACOMA",
         "COLORADO", "CANYON", "FRONTIER", "RANGER", "RIDGELINE",
         "TITAN", "AVALANCHE", "DAKOTA",
-    ]):
-        return "TRUCK"
-
+    )),
     # Minivans
-    if any(x in text for x in [
+    ("MINIVAN", (
         "SIENNA", "ODYSSEY", "PACIFICA", "CARAVAN", "QUEST",
         "SEDONA", "TOWN & COUNTRY", "TOWN AND COUNTRY",
-    ]):
-        return "MINIVAN"
-
+    )),
     # Convertibles
-    if any(x in text for x in ["CONVERT", "CABRIOLET", "ROADSTER", "SPYDER"]):
-        return "CONVERTIBLE"
-
+    ("CONVERTIBLE", ("CONVERT", "CABRIOLET", "ROADSTER", "SPYDER")),
     # Coupes
-    if any(x in text for x in [
+    ("COUPE", (
         " Q60", "MUSTANG", "CAMARO", "CHALLENGER", "CORVETTE",
         "370Z", "350Z", "86", "BRZ", "RC ", " TT ", "M4", "M2",
-    ]):
-        return "COUPE"
-
+    )),
     # Wagons
-    if any(x in text for x in ["WAGON", "ALLROAD", "SPORTBACK", " A4 AVANT", "OUTBACK"]):
-        return "WAGON"
-
+    ("WAGON", ("WAGON", "ALLROAD", "SPORTBACK", " A4 AVANT", "OUTBACK")),
     # Hatchbacks
-    if any(x in text for x in [
+    ("HATCHBACK", (
         " GOLF", " POLO", "HATCHBACK", "5-DOOR", "3-DOOR",
         "FOCUS ST", "FOCUS SE 5", "IMPREZA HATCH",
-    ]):
-        return "HATCHBACK"
-
+    )),
     # SUVs / Crossovers — check after trucks/vans to avoid false matches
-    if any(x in text for x in [
+    ("SUV", (
         "QX", "EXPLORER", "EXPEDITION", "NAVIGATOR", "ESCALADE",
         "SUBURBAN", "TAHOE", "YUKON", "TRAVERSE", "PILOT", "PASSPORT",
         "PATHFINDER", "ARMADA", "HIGHLANDER", "4RUNNER", "SEQUOIA",
@@ -493,63 +630,93 @@ def _infer_body_style(make: str, model: str, trim: str) -> str:
         "GRAND VITARA", "VITARA", "OUTLANDER", "ECLIPSE CROSS",
         "FORESTER", "CROSSTREK", "ASCENT", "BAJA",
         " EX35", " FX", " JX", " QX",
-    ]):
-        return "SUV"
-
-    # Default to SEDAN for everything else
-    return "SEDAN"
-
+    )),
+]
+_BODY_STYLE_RES: list[tuple[str, re.Pattern]] = [
+    (style, re.compile("|".join(map(re.escape, words))))
+    for style, words in _BODY_STYLE_KEYWORDS
+]
 
-def build_xml_feed(vehicles: list[Vehicle]) -> bytes:
-    """Return a Facebook automotive XML feed as UTF-8 bytes."""
-    root = ET.Element("listings")
-    ET.SubElement(root, "title").text = "Grubbs INFINITI of San Antonio"
 
-    for v in vehicles:
-        listing = ET.SubElement(root, "listing")
+@lru_cache(maxsize=1024)
+def _infer_body_style(make: str, model: str, trim: str) -> str:
+    """
+    Infer Facebook body_style enum from make/model/trim.
+    Accepted values: CONVERTIBLE, COUPE, CROSSOVER, HATCHBACK,
+                     MINIVAN, SEDAN, SUV, TRUCK, VAN, WAGON, OTHER
+    Memoised — an inventory repeats the same make/model/trim many times.
+    """
+    text = f"{make} {model} {trim}".upper()
+    for style, rx in _BODY_STYLE_RES:
+        if rx.search(text):
+            return style
 
-        ET.SubElement(listing, "vehicle_id").text  = v.vin
-        ET.SubElement(listing, "title").text        = v.title
-        ET.SubElement(listing, "description").text  = v.description
-        ET.SubElement(listing, "url").text           = v.link
+    # Default to SEDAN for everything else
+    return "SEDAN"
 
-        img = ET.SubElement(listing, "image")
-        ET.SubElement(img, "url").text = v.image_url
 
-        ET.SubElement(listing, "price").text = _price_to_decimal_str(v.price)
+# The feed schema is fixed, so listings are emitted straight from a string
+# template rather than built as an ElementTree (one format_map per vehicle
+# instead of ~25 element allocations).
+_XML_HEAD = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    "<listings><title>Grubbs INFINITI of San Antonio</title>"
+)
+_XML_ADDRESS = '<address format="simple">' + "".join(
+    f'<component name="{name}">{_xmlesc(value)}</component>'
+    for name, value in [
+        ("addr1",       DEALER_ADDR1),
+        ("city",        DEALER_CITY),
+        ("region",      DEALER_REGION),
+        ("postal_code", DEALER_POSTAL_CODE),
+        ("country",     DEALER_COUNTRY),
+    ]
+) + "</address>"
+_LISTING_TMPL = (
+    "<listing>"
+    "<vehicle_id>{vin}</vehicle_id>"
+    "<title>{title}</title>"
+    "<description>{description}</description>"
+    "<url>{link}</url>"
+    "<image><url>{image_url}</url></image>"
+    "<price>{price}</price>"
+    "<mileage><unit>MI</unit><value>{mileage}</value></mileage>"
+    "<body_style>{body_style}</body_style>"
+    "<state_of_vehicle>{condition}</state_of_vehicle>"
+    "<make>{make}</make>"
+    "<model>{model}</model>"
+    "{optional}"
+    + _XML_ADDRESS +
+    "</listing>"
+)
 
-        mil = ET.SubElement(listing, "mileage")
-        ET.SubElement(mil, "unit").text  = "MI"
-        ET.SubElement(mil, "value").text = v.mileage if v.mileage else "0"
 
-        body = v.body_style or _infer_body_style(v.make, v.model, v.trim)
-        ET.SubElement(listing, "body_style").text        = body
-        ET.SubElement(listing, "state_of_vehicle").text  = v.condition.upper()
-        ET.SubElement(listing, "make").text              = v.make
-        ET.SubElement(listing, "model").text             = v.model
+def write_xml_feed(vehicles: list[Vehicle], fh) -> None:
+    """Stream a Facebook automotive XML feed to binary file `fh`, one listing at a time."""
+    fh.write(_XML_HEAD.encode("utf-8"))
+    for v in vehicles:
+        optional = ""
         if v.year:
-            ET.SubElement(listing, "year").text = v.year
+            optional += f"<year>{_xmlesc(v.year)}</year>"
         if v.trim:
-            ET.SubElement(listing, "trim").text = v.trim
+            optional += f"<trim>{_xmlesc(v.trim)}</trim>"
         if v.exterior_color:
-            ET.SubElement(listing, "exterior_color").text = v.exterior_color
-
-        addr = ET.SubElement(listing, "address")
-        addr.set("format", "simple")
-        for name, value in [
-            ("addr1",       DEALER_ADDR1),
-            ("city",        DEALER_CITY),
-            ("region",      DEALER_REGION),
-            ("postal_code", DEALER_POSTAL_CODE),
-            ("country",     DEALER_COUNTRY),
-        ]:
-            c = ET.SubElement(addr, "component")
-            c.set("name", name)
-            c.text = value
-
-    buf = io.BytesIO()
-    ET.ElementTree(root).write(buf, encoding="utf-8", xml_declaration=True)
-    return buf.getvalue()
+            optional += f"<exterior_color>{_xmlesc(v.exterior_color)}</exterior_color>"
+        fh.write(_LISTING_TMPL.format_map({
+            "vin":         _xmlesc(v.vin),
+            "title":       _xmlesc(v.title),
+            "description": _xmlesc(v.description),
+            "link":        _xmlesc(v.link),
+            "image_url":   _xmlesc(v.image_url),
+            "price":       _xmlesc(_price_to_decimal_str(v.price)),
+            "mileage":     _xmlesc(v.mileage) if v.mileage else "0",
+            "body_style":  _xmlesc(v.body_style or _infer_body_style(v.make, v.model, v.trim)),
+            "condition":   _xmlesc(v.condition.upper()),
+            "make":        _xmlesc(v.make),
+            "model":       _xmlesc(v.model),
+            "optional":    optional,
+        }).encode("utf-8"))
+    fh.write(b"</listings>")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -563,30 +730,59 @@ CSV_FIELDS = [
 
 def save_csv(vehicles: list[Vehicle], path: str = CSV_OUTPUT_PATH) -> None:
     with open(path, "w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=CSV_FIELDS)
-        writer.writeheader()
-        for v in vehicles:
-            writer.writerow({
-                "vehicle_id":      v.vin,
-                "title":           v.title,
-                "description":     v.description,
-                "price":           _price_to_decimal_str(v.price),
-                "url":             v.link,
-                "image_url":       v.image_url,
-                "year":            v.year,
-                "make":            v.make,
-                "model":           v.model,
-                "trim":            v.trim,
-                "mileage":         v.mileage,
-                "exterior_color":  v.exterior_color,
-                "state_of_vehicle": v.condition.upper(),
-            })
+        writer = csv.writer(fh)
+        writer.writerow(CSV_FIELDS)
+        # Plain tuples in CSV_FIELDS order, handed to the C writer in one call —
+        # no per-row dict for DictWriter to rebuild into a list
+        writer.writerows(
+            (
+                v.vin,
+                v.title,
+                v.description,
+                _price_to_decimal_str(v.price),
+                v.link,
+                v.image_url,
+                v.year,
+                v.make,
+                v.model,
+                v.trim,
+                v.mileage,
+                v.exterior_color,
+                v.condition.upper(),
+            )
+            for v in vehicles
+        )
     print(f"[CSV] Saved {len(vehicles)} vehicles → {path}", flush=True)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Step 4b — Upload to Facebook Catalog API
 # ──────────────────────────────────────────────────────────────────────────────
+def _graph_batch(paths: list[str]) -> list[dict]:
+    """
+    GET several Graph API paths in a single batch request (one round-trip).
+    Returns the decoded body of each sub-request, in order; a sub-request that
+    failed comes back as its usual {"error": {...}} body.
+    """
+    r = _GRAPH.post(
+        f"{_GRAPH_BASE}/",
+        data={
+            "access_token": FB_ACCESS_TOKEN,
+            "batch": json.dumps([{"method": "GET", "relative_url": p} for p in paths]),
+        },
+        timeout=15,
+    )
+    data = r.json()
+    if isinstance(data, dict) and "error" in data:
+        raise RuntimeError(data["error"].get("message"))
+    # Graph returns null for a sub-request that timed out on its side
+    return [
+        json.loads(item.get("body") or "{}") if item
+        else {"error": {"message": "no response for batched request"}}
+        for item in data
+    ]
+
+
 def resolve_catalog_id() -> str:
     """
     Return FB_CATALOG_ID from env, or auto-discover the first automotive
@@ -600,16 +796,19 @@ def resolve_catalog_id() -> str:
 
     print("[FB] FB_CATALOG_ID not set — querying Graph API to find your catalog…", flush=True)
 
-    base = f"https://graph.facebook.com/{FB_API_VERSION}"
-    token_param = f"access_token={FB_ACCESS_TOKEN}"
+    # Both lookups ride in one batch request; the fallback's answer is only
+    # used if the businesses route finds nothing
+    try:
+        biz_data, cat_data = _graph_batch([
+            "me/businesses?fields=id,name,owned_product_catalogs{id,name}",
+            "me/product_catalogs?fields=id,name",
+        ])
+    except Exception as exc:
+        biz_data = cat_data = {"error": {"message": f"batch request failed: {exc}"}}
 
     # Try: businesses the token can see → their owned catalogs
     try:
-        r = requests.get(
-            f"{base}/me/businesses?fields=id,name,owned_product_catalogs{{id,name}}&{token_param}",
-            timeout=15,
-        )
-        data = r.json()
+        data = biz_data
         if "error" in data:
             print(f"[FB] businesses API error: {data['error'].get('message')}", flush=True)
         else:
@@ -628,11 +827,7 @@ def resolve_catalog_id() -> str:
 
     # Fallback: catalogs directly on the token (system-user tokens)
     try:
-        r = requests.get(
-            f"{base}/me/product_catalogs?fields=id,name&{token_param}",
-            timeout=15,
-        )
-        data = r.json()
+        data = cat_data
         if "error" in data:
             print(f"[FB] product_catalogs API error: {data['error'].get('message')}", flush=True)
         else:
@@ -650,15 +845,9 @@ def resolve_catalog_id() -> str:
     return ""
 
 
-def check_catalog_type(catalog_id: str) -> None:
-    """Query and print the catalog's vertical/type so the user can confirm it's automotive."""
+def check_catalog_type(data: dict) -> None:
+    """Print the catalog's vertical/type (a GET /{catalog_id} body) so the user can confirm it's automotive."""
     try:
-        r = requests.get(
-            f"https://graph.facebook.com/{FB_API_VERSION}/{catalog_id}",
-            params={"fields": "id,name,vertical", "access_token": FB_ACCESS_TOKEN},
-            timeout=15,
-        )
-        data = r.json()
         if "error" in data:
             print(f"  [FB] Could not read catalog info: {data['error'].get('message')}", flush=True)
         else:
@@ -676,15 +865,11 @@ def check_catalog_type(catalog_id: str) -> None:
         print(f"  [FB] catalog type check failed: {exc}", flush=True)
 
 
-def _get_or_create_feed(catalog_id: str) -> str:
-    """Return the ID of the first product feed for this catalog, creating one if needed."""
-    base = f"https://graph.facebook.com/{FB_API_VERSION}"
-    r = requests.get(
-        f"{base}/{catalog_id}/product_feeds",
-        params={"access_token": FB_ACCESS_TOKEN, "fields": "id,name"},
-        timeout=15,
-    )
-    data = r.json()
+def _get_or_create_feed(catalog_id: str, data: dict) -> str:
+    """
+    Return the ID of the first product feed for this catalog, creating one if
+    needed. `data` is the GET /{catalog_id}/product_feeds body.
+    """
     if "error" in data:
         raise RuntimeError(data["error"].get("message"))
     feeds = data.get("data", [])
@@ -692,9 +877,9 @@ def _get_or_create_feed(catalog_id: str) -> str:
         feed = feeds[0]
         print(f"  [FB] Using existing feed: '{feed['name']}' (id={feed['id']})", flush=True)
         return feed["id"]
-    # Create a new feed
-    r = requests.post(
-        f"{base}/{catalog_id}/product_feeds",
+    # Create a new feed — sent once, never retried
+    r = _GRAPH_ONCE.post(
+        f"{_GRAPH_BASE}/{catalog_id}/product_feeds",
         data={"name": "Grubbs INFINITI Inventory", "access_token": FB_ACCESS_TOKEN},
         timeout=15,
     )
@@ -706,19 +891,44 @@ def _get_or_create_feed(catalog_id: str) -> str:
     return feed_id
 
 
-def upload_to_facebook(vehicles: list[Vehicle]) -> bool:
-    """
-    Upload vehicles to the Facebook Product Catalog via CSV feed upload.
-    Uses the product_feeds / uploads API which accepts full automotive field names.
-    """
-    if not FB_ACCESS_TOKEN:
-        print(
-            "\n[FB] FB_ACCESS_TOKEN not set — skipping upload.\n"
-            "     Fill it in .env and re-run, or use --csv-only to just export the feed.",
-            flush=True,
-        )
-        return False
+# catalog_id/feed_id almost never change, so a recent run's answer is kept in
+# the dashboard DB's settings table and the discovery round-trips are skipped
+_FEED_CACHE_KEY = "fb_feed_cache"
+_FEED_CACHE_TTL = 24 * 3600   # seconds
+
+
+def _feed_cache_owner() -> str:
+    """Hash of the token + configured catalog; a change to either invalidates the cache."""
+    return hashlib.sha256(f"{FB_ACCESS_TOKEN}|{FB_CATALOG_ID}".encode()).hexdigest()[:16]
+
+
+def _load_cached_feed_id() -> str:
+    """Feed ID saved by a run in the last _FEED_CACHE_TTL seconds, or ''."""
+    try:
+        import db as _db
+        _db.init_db()
+        cache = json.loads(_db.get_setting(_FEED_CACHE_KEY) or "{}")
+    except Exception:
+        return ""
+    if cache.get("owner") != _feed_cache_owner() or time.time() - cache.get("ts", 0) > _FEED_CACHE_TTL:
+        return ""
+    return cache.get("feed_id", "")
+
 
+def _save_cached_feed_id(catalog_id: str, feed_id: str) -> None:
+    try:
+        import db as _db
+        _db.init_db()
+        _db.set_setting(_FEED_CACHE_KEY, json.dumps({
+            "owner": _feed_cache_owner(), "catalog_id": catalog_id,
+            "feed_id": feed_id, "ts": int(time.time()),
+        }) if feed_id else "")   # empty feed_id clears the cache
+    except Exception as exc:
+        print(f"  [FB] Could not update feed cache: {exc}", flush=True)
+
+
+def _discover_feed_id() -> str:
+    """Resolve the catalog, check its type and find/create its feed. Returns '' on failure."""
     catalog_id = resolve_catalog_id()
     if not catalog_id:
         print(
@@ -726,28 +936,107 @@ def upload_to_facebook(vehicles: list[Vehicle]) -> bool:
             "     Set FB_CATALOG_ID in .env and re-run.",
             flush=True,
         )
-        return False
+        return ""
 
-    check_catalog_type(catalog_id)
+    # The type check and the feed lookup are independent reads — one batch
+    try:
+        catalog_info, feeds_data = _graph_batch([
+            f"{catalog_id}?fields=id,name,vertical",
+            f"{catalog_id}/product_feeds?fields=id,name",
+        ])
+    except Exception as exc:
+        print(f"  [FB] Could not read catalog/feeds: {exc}", flush=True)
+        return ""
+
+    check_catalog_type(catalog_info)
 
     try:
-        feed_id = _get_or_create_feed(catalog_id)
+        feed_id = _get_or_create_feed(catalog_id, feeds_data)
     except Exception as exc:
         print(f"  [FB] Could not get/create feed: {exc}", flush=True)
-        return False
+        return ""
 
-    # Build XML feed in the format Facebook's template specifies
-    xml_bytes = build_xml_feed(vehicles)
+    _save_cached_feed_id(catalog_id, feed_id)
+    return feed_id
 
-    # Upload the XML to the feed
-    endpoint = f"https://graph.facebook.com/{FB_API_VERSION}/{feed_id}/uploads"
-    resp = requests.post(
-        endpoint,
-        files={"file": ("inventory.xml", xml_bytes, "text/xml")},
-        data={"access_token": FB_ACCESS_TOKEN},
-        timeout=120,
+
+def _feed_is_missing(status: int, result: dict) -> bool:
+    """True if an upload response says the target feed doesn't exist or can't be used."""
+    error = result.get("error")
+    if not error:
+        return False
+    return (
+        (status in (400, 404) and error.get("code") in (100, 803))
+        or "does not exist" in str(error.get("message", "")).lower()
     )
-    result = resp.json()
+
+
+def upload_to_facebook(vehicles: list[Vehicle]) -> bool:
+    """
+    Upload vehicles to the Facebook Product Catalog via CSV feed upload.
+    Uses the product_feeds / uploads API which accepts full automotive field names.
+    """
+    if not FB_ACCESS_TOKEN:
+        print(
+            "\n[FB] FB_ACCESS_TOKEN not set — skipping upload.\n"
+            "     Fill it in .env and re-run, or use --csv-only to just export the feed.",
+            flush=True,
+        )
+        return False
+
+    feed_id = _load_cached_feed_id()
+    from_cache = bool(feed_id)
+    if from_cache:
+        print(f"  [FB] Using cached feed (id={feed_id})", flush=True)
+    else:
+        feed_id = _discover_feed_id()
+        if not feed_id:
+            return False
+
+    # Build the multipart upload body — access_token field, file preamble, XML
+    # feed in the format Facebook's template specifies, closing boundary —
+    # straight into a temp file. Handed over as a file object, requests takes Content-Length from it
+    # and streams it to the socket, so the feed is never held in memory.
+    # (A real file rather than a SpooledTemporaryFile: requests sizes the body
+    # via fileno(), which would force the spool to disk anyway.)
+    boundary = uuid.uuid4().hex
+    with tempfile.TemporaryFile() as body:
+        # The token rides in the body, as in a regular form post, so it stays
+        # out of URLs that proxies and request logs record
+        body.write(
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="access_token"\r\n\r\n'
+            f"{FB_ACCESS_TOKEN}\r\n"
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="inventory.xml"\r\n'
+            "Content-Type: text/xml\r\n\r\n".encode("utf-8")
+        )
+        write_xml_feed(vehicles, body)
+        body.write(f"\r\n--{boundary}--\r\n".encode("ascii"))
+
+        def post_feed(feed_id: str) -> tuple[int, dict]:
+            body.seek(0)
+            resp = _GRAPH_UPLOAD.post(
+                f"{_GRAPH_BASE}/{feed_id}/uploads",
+                data=body,
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                timeout=120,
+            )
+            return resp.status_code, resp.json()
+
+        # Upload the XML to the feed
+        status, result = post_feed(feed_id)
+
+        # A cached feed may have been deleted since — rediscover and retry once.
+        # Other errors (throttling, a rejected feed, a bad token) would hit the
+        # rediscovered feed just the same, so they keep the cache and fail below
+        if from_cache and _feed_is_missing(status, result):
+            print(f"  [FB] Cached feed rejected ({result['error'].get('message')}) — rediscovering…", flush=True)
+            _save_cached_feed_id("", "")   # forget the stale IDs
+            feed_id = _discover_feed_id()
+            if not feed_id:
+                return False
+            status, result = post_feed(feed_id)
 
     if "error" in result:
         print(f"  [FB] Upload ERROR: {result['error']}", flush=True)
@@ -759,6 +1048,47 @@ def upload_to_facebook(vehicles: list[Vehicle]) -> bool:
     return True
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Step 5 — Persist to dashboard DB
+# ──────────────────────────────────────────────────────────────────────────────
+def _persist_inventory(
+    vehicles: list[Vehicle],
+    attempts: dict[str, int],
+    skip_vins: set[str],
+    scraped: bool,
+) -> int:
+    """
+    Upsert this run's inventory and update the price-scrape attempt counters.
+    Returns how many vehicles just reached MAX_SCRAPE_ATTEMPTS.
+    """
+    import db as _db
+    _db.init_db()
+    # Vehicle is flat, so a shallow field read replaces asdict()'s deep copy
+    _db.upsert_vehicles({k: getattr(v, k) for k in _VEHICLE_FIELDS} for v in vehicles)
+
+    # Update scrape-attempt counters:
+    #   - vehicles that just got priced → reset to 0
+    #   - vehicles that were attempted but still have no price → increment
+    #   - vehicles that were skipped (in skip_vins) → leave unchanged
+    failed_new = 0
+    try:
+        _attempt_updates: dict[str, int] = {}
+        for v in (vehicles if scraped else ()):
+            if v.vin in skip_vins:
+                continue
+            if v.price:
+                _attempt_updates[v.vin] = 0          # success — reset
+            else:
+                prev = attempts.get(v.vin, 0)
+                _attempt_updates[v.vin] = prev + 1   # failure — increment
+        if _attempt_updates:
+            _db.update_scrape_attempts(_attempt_updates)
+            failed_new = sum(1 for c in _attempt_updates.values() if c >= MAX_SCRAPE_ATTEMPTS)
+    except Exception:
+        pass   # attempt tracking is best-effort
+    return failed_new
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Entry point
 # ──────────────────────────────────────────────────────────────────────────────
@@ -817,53 +1147,39 @@ def main() -> None:
     print("\n[3/4] Saving CSV backup…")
     save_csv(vehicles)
 
-    # 4 — Facebook upload
-    if args.csv_only:
-        print("\n[4/4] Skipping Facebook upload (--csv-only).")
-        print(f"\nFeed saved to: {CSV_OUTPUT_PATH}")
-        print("You can upload this CSV manually via Business Manager → Catalogs → Data Sources.")
-    else:
-        print("\n[4/4] Uploading to Facebook Catalog…")
-        ok = upload_to_facebook(vehicles)
-        success = ok
-        if ok:
-            print("\nAll done — inventory is live in your Facebook catalog!")
+    # 4 — Facebook upload. The inventory is written to the dashboard DB (5a) on
+    # a worker thread meanwhile: one waits on the network, the other on SQLite
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        persist_future = pool.submit(
+            _persist_inventory, vehicles, _attempts, _skip_vins,
+            scraped=not args.no_price_scrape,
+        )
+        if args.csv_only:
+            print("\n[4/4] Skipping Facebook upload (--csv-only).")
+            print(f"\nFeed saved to: {CSV_OUTPUT_PATH}")
+            print("You can upload this CSV manually via Business Manager → Catalogs → Data Sources.")
         else:
-            print("\nDone with some errors — check output above.")
-
-    # 5 — Persist to dashboard DB
+            print("\n[4/4] Uploading to Facebook Catalog…")
+            # The worker may already have written the inventory, so an upload
+            # failure must not skip recording the run below
+            try:
+                ok = upload_to_facebook(vehicles)
+            except Exception as exc:
+                print(f"  [FB] Upload ERROR: {exc}", flush=True)
+                ok = False
+            success = ok
+            if ok:
+                print("\nAll done — inventory is live in your Facebook catalog!")
+            else:
+                print("\nDone with some errors — check output above.")
+
+    # 5b — Record the run (needs the upload outcome)
     try:
+        failed_new = persist_future.result()
+        if failed_new:
+            print(f"[DB] {failed_new} vehicles now at max attempts and will be skipped next run.", flush=True)
         import db as _db
-        _db.init_db()
-        vehicle_dicts = [asdict(v) for v in vehicles]
-        _db.upsert_vehicles(vehicle_dicts)
         priced_count = sum(1 for v in vehicles if v.price)
-
-        # Update scrape-attempt counters:
-        #   - vehicles that just got priced → reset to 0
-        #   - vehicles that were attempted but still have no price → increment
-        #   - vehicles that were skipped (in _skip_vins) → leave unchanged
-        try:
-            _attempt_updates: dict[str, int] = {}
-            _attempted_this_run: set[str] = set()
-            if not args.no_price_scrape:
-                _attempted_this_run = {v.vin for v in vehicles if v.vin not in _skip_vins}
-            for v in vehicles:
-                if v.vin not in _attempted_this_run:
-                    continue
-                if v.price:
-                    _attempt_updates[v.vin] = 0          # success — reset
-                else:
-                    prev = _attempts.get(v.vin, 0)
-                    _attempt_updates[v.vin] = prev + 1   # failure — increment
-            if _attempt_updates:
-                _db.update_scrape_attempts(_attempt_updates)
-                failed_new = sum(1 for c in _attempt_updates.values() if c >= MAX_SCRAPE_ATTEMPTS)
-                if failed_new:
-                    print(f"[DB] {failed_new} vehicles now at max attempts and will be skipped next run.", flush=True)
-        except Exception:
-            pass   # attempt tracking is best-effort
-
         _db.record_sync_run({
             "vehicles_found":    len(vehicles),
             "vehicles_priced":   priced_count,